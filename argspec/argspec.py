@@ -80,7 +80,11 @@ class ArgSpec(metaclass=ArgSpecMeta):
     def _from_argv(cls, argv: Sequence[str] | None = None) -> Self:
         """Parse the given argv (or sys.argv[1:]) into an instance of the class."""
         kwargs = cls.__argspec_schema__.parse_args(argv)
-        return cls(**kwargs)
+
+        # parse_args has already coerced, defaulted and validated every value, so there's no need to do it again
+        inst = cls(**kwargs, __ARGSPEC_SKIP_VALIDATION__=True)  # type: ignore[call-arg]
+        object.__setattr__(inst, "__ARGSPEC_VALIDATED__", True)
+        return inst
 
     @classmethod
     def from_argv(cls, argv: Sequence[str] | None = None) -> Self:
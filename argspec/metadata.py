@@ -59,7 +59,7 @@ def assign_default_and_factory(
             raise ArgumentSpecError("Cannot specify both default and default_factory")
 
 
-@dataclass
+@dataclass(slots=True)
 class Positional(Generic[S, T]):
     default: S | MissingType
     default_factory: Callable[[], S] | None
@@ -71,7 +71,7 @@ class Positional(Generic[S, T]):
         return self.default is MISSING and self.default_factory is None
 
 
-@dataclass
+@dataclass(slots=True)
 class Option(Generic[S, T]):
     default: S | MissingType
     default_factory: Callable[[], S] | None
@@ -86,7 +86,7 @@ class Option(Generic[S, T]):
         return self.default is MISSING and self.default_factory is None
 
 
-@dataclass
+@dataclass(slots=True)
 class Flag:
     default: bool
     short: bool
@@ -248,7 +248,7 @@ else:
             converter=converter,
             short=short,
             long=long,
-            aliases=aliases or [],
+            aliases=aliases or (),
             validator=validator,
             help=help,
         )
@@ -286,7 +286,7 @@ else:
         if sys.version_info >= (3, 14):
             extra["doc"] = help
 
-        obj = Flag(default=default, short=short, long=long, aliases=aliases or [], negators=negators or [], help=help)
+        obj = Flag(default=default, short=short, long=long, aliases=aliases or (), negators=negators or (), help=help)
 
         metadata = ArgSpecMetadata(argspec=obj)
 
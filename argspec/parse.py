@@ -1,13 +1,15 @@
-from collections import deque
-from collections.abc import Sequence
-from dataclasses import dataclass, fields
-from io import StringIO
+from collections.abc import Callable, Container, Hashable, Iterable, Sequence
+from dataclasses import dataclass, field, fields
+from enum import Enum, IntEnum
+import functools
+import inspect
 import itertools
-from pathlib import Path
+import os
 import sys
-from typing import Any, cast, get_args, get_origin, NamedTuple, TYPE_CHECKING, TypeVar
+from types import CodeType, NoneType, UnionType
+from typing import Any, cast, get_args, get_origin, Literal, NamedTuple, TYPE_CHECKING, TypeVar, Union
 
-from typewire import as_string, as_type, is_iterable, TypeHint
+from typewire import as_string, as_type, is_iterable, is_mapping, TypeHint
 from typing_extensions import get_annotations
 
 if TYPE_CHECKING:
@@ -21,13 +23,66 @@ else:
     from typing_extensions import Self
 
 from .errors import ArgumentError, ArgumentSpecError
-from .metadata import _true, Flag, MISSING, Option, Positional
-from .readenv import readenv
+from .metadata import _true, Flag, is_mutable, MISSING, Option, Positional
+from .readenv import EnvGetter, readenv
+
+
+Coercer = Callable[[Any], Any]
+
+# a piece of the help text: either fixed text, or a callable producing text that may change between calls
+# (given the function to read environment variables with)
+HelpPart = str | Callable[[EnvGetter], str]
 
 
 class ArgvConsumeResult(NamedTuple):
     parsed_args: dict[str, Any]
-    positional_args: deque[str]
+    positional_args: list[str]
+
+
+class FieldKind(IntEnum):
+    POSITIONAL = 0
+    OPTION = 1
+    FLAG = 2
+
+
+@dataclass(frozen=True, slots=True)
+class FieldInfo:
+    """Everything needed to parse a single field, resolved once from its annotation and metadata."""
+
+    name: str
+    kind: FieldKind
+    type_: TypeHint
+    meta: Positional[Any, Any] | Option[Any, Any] | Flag
+    arity: int | None
+    iterable: bool
+    multi_value: bool  # whether the value is collected from several tokens, rather than being a single token
+    converter: Callable[[str], Any] | None
+    coerce: Coercer
+    validator: Callable[[Any], bool]
+
+
+class TokenTarget(NamedTuple):
+    info: FieldInfo
+    negated: bool  # whether the token is a negator (so it sets its flag to False)
+
+
+class PositionalPlan(NamedTuple):
+    info: FieldInfo
+    meta: Positional[Any, Any]
+    default: Any
+    required_after: int  # the minimum number of tokens needed by the positional arguments after this one
+
+
+class ParsePlan(NamedTuple):
+    """The per-class parsing data derived from a schema, computed once so that parsing can walk flat tuples."""
+
+    fields: dict[str, FieldInfo]
+    tokens: dict[str, TokenTarget]  # every alias and negator -> the field it refers to
+    positionals: tuple[PositionalPlan, ...]
+    static_defaults: dict[str, Any]  # option/flag name -> already-coerced default value
+    defaults: tuple[FieldInfo, ...]  # options/flags whose default must be resolved at parse time
+    help_keys: frozenset[str]
+    validators: tuple[tuple[str, Callable[[Any], bool]], ...]
 
 
 C = TypeVar("C")
@@ -49,6 +104,14 @@ def get_container_length(type_hint: TypeHint) -> int | None:
     >>> get_container_length(tuple[int, ...])
     None
     """
+    try:
+        return _cached_container_length(type_hint)
+    except TypeError:
+        # the type hint is unhashable (e.g., Annotated with unhashable metadata), so it can't be cached
+        return _container_length(type_hint)
+
+
+def _container_length(type_hint: TypeHint) -> int | None:
     if not is_iterable(type_hint):
         return 0
 
@@ -70,6 +133,181 @@ def get_container_length(type_hint: TypeHint) -> int | None:
     return None
 
 
+# type hints are stable, so the (fairly expensive) typing introspection only needs to be done once per hint
+_cached_container_length = functools.lru_cache(maxsize=512)(_container_length)
+
+
+def make_coercer(type_hint: TypeHint) -> Coercer:
+    """Build a function that coerces a value to the given type hint, equivalent to as_type(value, type_hint).
+
+    Plain classes and Literal hints are resolved here, once, so that coercing a value is a direct call rather than a
+    full dispatch on the type hint. Anything else is delegated to as_type.
+
+    >>> make_coercer(int)("3")
+    3
+
+    >>> make_coercer(Literal["a", "b"])("c")
+    ValueError: Value 'c' does not match any literal in typing.Literal['a', 'b']
+    """
+    if cast(Any, get_origin(type_hint)) is Literal:
+        choices = get_args(type_hint)
+
+        def coerce_literal(value: Any) -> Any:
+            if value in choices:
+                return value
+
+            raise ValueError(f"Value {value!r} does not match any literal in {type_hint}")
+
+        return coerce_literal
+
+    # on Python 3.10, parameterised builtin generics (e.g., type[int]) count as instances of type,
+    # but they can't be used with isinstance, so they're excluded by checking for an origin
+    if (
+        isinstance(type_hint, type)
+        and get_origin(type_hint) is None
+        and cast(Any, type_hint) is not Any
+        and not inspect.isabstract(type_hint)
+        and not is_iterable(type_hint)
+        and not is_mapping(type_hint)
+    ):
+        cls: type[Any] = type_hint
+
+        def coerce_instance(value: Any) -> Any:
+            # an exact type match is the common case, and is cheaper to check than isinstance
+            return value if type(value) is cls or isinstance(value, cls) else cls(value)
+
+        return coerce_instance
+
+    def coerce(value: Any) -> Any:
+        return as_type(value, type_hint)
+
+    return coerce
+
+
+# builtin types whose instances can't be changed, so a single instance can safely be shared between parses
+IMMUTABLE_TYPES: frozenset[type] = frozenset({NoneType, bool, int, float, complex, str, bytes})
+
+
+def is_immutable(value: Any) -> bool:
+    """Determine if the given value is known to be immutable, and so can be shared between parses.
+
+    Unlike is_mutable, this doesn't treat hashable values as immutable: instances of ordinary classes are hashable (by
+    identity) but can still be modified.
+    """
+    if type(value) in IMMUTABLE_TYPES or isinstance(value, Enum):
+        return True
+
+    if type(value) in (tuple, frozenset):
+        return all(is_immutable(item) for item in value)
+
+    return False
+
+
+def is_immutable_hint(type_hint: TypeHint) -> bool:
+    """Determine if coercing to the given type hint can only produce immutable values without running user code."""
+    if type_hint is None:
+        return True
+
+    origin = cast(Any, get_origin(type_hint))
+
+    # only plain classes are looked up, since other hints may be unhashable (e.g., Annotated with a dict)
+    if origin is None and isinstance(type_hint, type):
+        return type_hint in IMMUTABLE_TYPES or issubclass(type_hint, Enum)
+
+    if origin is Literal:
+        return all(is_immutable(choice) for choice in get_args(type_hint))
+
+    if origin in (Union, UnionType, tuple, frozenset):
+        return all(arg is Ellipsis or is_immutable_hint(arg) for arg in get_args(type_hint))
+
+    return False
+
+
+def coerce_default(default: Any, type_hint: TypeHint, coerce: Coercer) -> Any:
+    """Coerce a static default value ahead of time, using the field's coercer.
+
+    This is only done when it's known to be safe: either the type hint only allows immutable values (so coercing can't
+    run user code, and the result can be shared between parses), or the default is already exactly of the annotated
+    type and coercing it gives back the default object itself (which the dataclass field shares anyway).
+
+    Otherwise, return MISSING so that the value is coerced at parse time, as it is when there is no static default or
+    the coercion fails (so that the error is raised when parsing, as usual).
+    """
+    if default is MISSING:
+        return MISSING
+
+    immutable_hint = is_immutable_hint(type_hint)
+    if not immutable_hint and not (isinstance(type_hint, type) and type(default) is type_hint):
+        return MISSING
+
+    try:
+        value = coerce(default)
+    except (ValueError, TypeError):
+        return MISSING
+
+    if immutable_hint and is_immutable(value):
+        return value
+
+    return value if value is default and not is_mutable(value) else MISSING
+
+
+@functools.lru_cache(maxsize=512)
+def compile_annotation(annotation: str) -> CodeType:
+    return compile(annotation, "<annotation>", "eval")
+
+
+def get_resolved_annotations(wrapped_cls: type, names: Container[str] | None = None) -> dict[str, Any]:
+    """Return the class's annotations with any string annotations evaluated.
+
+    This is equivalent to get_annotations(wrapped_cls, eval_str=True), except that each distinct annotation string is
+    only compiled once per process, since compiling (rather than evaluating) dominates the cost of resolving them.
+    If names is given, only the string annotations of those names are evaluated; the rest are returned as they are.
+    """
+    annotations: dict[str, Any] = get_annotations(wrapped_cls)
+
+    if not any(isinstance(annot, str) and (names is None or name in names) for name, annot in annotations.items()):
+        return annotations
+
+    # use the same namespaces that get_annotations(..., eval_str=True) would
+    module = sys.modules.get(wrapped_cls.__module__)
+    globalns = getattr(module, "__dict__", None)
+    localns = dict(vars(wrapped_cls))
+
+    if type_params := getattr(wrapped_cls, "__type_params__", ()):
+        localns = {param.__name__: param for param in type_params} | localns
+
+    return {
+        name: (
+            eval(compile_annotation(annot), globalns, localns)
+            if isinstance(annot, str) and (names is None or name in names)
+            else annot
+        )
+        for name, annot in annotations.items()
+    }
+
+
+def get_program_name(argv0: str) -> str:
+    """Get the final component of the given path, as Path(argv0).name would, without importing pathlib.
+
+    Like pathlib, this ignores empty and "." components (but doesn't resolve ".."), as well as any drive.
+
+    >>> get_program_name("/usr/bin/prog")
+    'prog'
+
+    >>> get_program_name("foo/.")
+    'foo'
+
+    >>> get_program_name(".")
+    ''
+    """
+    path = os.path.splitdrive(argv0)[1]
+
+    if os.altsep:
+        path = path.replace(os.altsep, os.sep)
+
+    return next((part for part in reversed(path.split(os.sep)) if part not in ("", ".")), "")
+
+
 def kebabify(text: str, *, lower: bool = False) -> str:
     kebab = text.replace("_", "-")
     return kebab.lower() if lower else kebab
@@ -87,36 +325,162 @@ def format_help_message_for_positional(name: str, type_: TypeHint, meta: Positio
     return value if meta.is_required() else f"[{value}]"
 
 
+# types whose equal values are indistinguishable, so they can be compared by value alone
+EXACT_TYPES: frozenset[type] = frozenset({NoneType, bool, int, str, bytes})
+
+
+def freeze(value: Any) -> Hashable:
+    """Return a hashable representation of the value, raising TypeError if there isn't one.
+
+    The type of each value is included so that values which compare equal but behave differently (such as 1 and True)
+    are kept distinct. Likewise, apart from the types in EXACT_TYPES, the repr is included so that values which compare
+    equal but display differently (such as Decimal("1.0") and Decimal("1.00"), or 0.0 and -0.0) are kept distinct.
+    """
+    if isinstance(value, (list, tuple)):
+        return type(value), tuple(freeze(item) for item in value)
+
+    hash(value)
+
+    if type(value) in EXACT_TYPES:
+        return type(value), value
+
+    return type(value), value, repr(value)
+
+
+def fingerprint_args(args: dict[str, tuple[TypeHint, Positional[Any, Any] | Option[Any, Any] | Flag]]) -> Hashable:
+    """Return a hashable key identifying the given schema arguments, raising TypeError if there isn't one."""
+    return tuple(
+        (
+            name,
+            freeze(type_),
+            type(meta),
+            tuple(freeze(getattr(meta, f.name)) for f in fields(meta)),
+        )
+        for name, (type_, meta) in args.items()
+    )
+
+
+def format_factory_default(factory: Callable[[], Any], getenv: EnvGetter) -> str:
+    """Describe the value a default_factory currently provides, for use in the help message.
+    getenv is used to read the environment variable of a readenv factory.
+    """
+    if isinstance(factory, readenv):
+        return factory.help_fragment(getenv)
+
+    return f" (default: {factory()})"
+
+
+SCHEMA_CACHE_SIZE = 256
+_schema_cache: dict[Hashable, "Schema"] = {}
+
+
 @dataclass(frozen=True, slots=True)
 class Schema:
     args: dict[str, tuple[TypeHint, Positional[Any, Any] | Option[Any, Any] | Flag]]
     aliases: dict[str, str]
     flag_negators: dict[str, str]
+    positional_args: dict[str, tuple[TypeHint, Positional[Any, Any]]] = field(init=False, repr=False, compare=False)
+    option_args: dict[str, tuple[TypeHint, Option[Any, Any]]] = field(init=False, repr=False, compare=False)
+    flag_args: dict[str, tuple[TypeHint, Flag]] = field(init=False, repr=False, compare=False)
+    help_keys: tuple[str, ...] = field(init=False, repr=False, compare=False)
+    named_tokens: frozenset[str] = field(init=False, repr=False, compare=False)
+    plan: ParsePlan = field(init=False, repr=False, compare=False)
+    help_cache: dict[str, tuple[HelpPart, ...]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    help_body: tuple[HelpPart, ...] | None = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
-        arities = [self.nargs_for(name) for name in self.positional_args.keys()]
+        # the schema is frozen, so these views of self.args are computed once here rather than on every access
+        positional_args: dict[str, tuple[TypeHint, Positional[Any, Any]]] = {}
+        option_args: dict[str, tuple[TypeHint, Option[Any, Any]]] = {}
+        flag_args: dict[str, tuple[TypeHint, Flag]] = {}
+
+        for name, (type_, meta) in self.args.items():
+            if isinstance(meta, Positional):
+                positional_args[name] = (type_, meta)
+            elif isinstance(meta, Option):
+                option_args[name] = (type_, meta)
+            elif isinstance(meta, Flag):
+                flag_args[name] = (type_, meta)
+
+        object.__setattr__(self, "positional_args", positional_args)
+        object.__setattr__(self, "option_args", option_args)
+        object.__setattr__(self, "flag_args", flag_args)
+        # -h/--help are only recognised when no field or alias claims them
+        help_keys = tuple(k for k in ("-h", "--help") if k not in self.args and k not in self.aliases)
+        object.__setattr__(self, "help_keys", help_keys)
+        object.__setattr__(self, "named_tokens", frozenset((*self.aliases.keys(), *self.flag_negators.keys())))
+
+        object.__setattr__(self, "plan", self.make_plan())
+
+    def make_field_info(self, name: str) -> FieldInfo:
+        type_, meta = self.args[name]
+        kind = {Positional: FieldKind.POSITIONAL, Option: FieldKind.OPTION, Flag: FieldKind.FLAG}[type(meta)]
+        converter = None if isinstance(meta, Flag) else meta.converter
+        iterable = is_iterable(type_)
+
+        return FieldInfo(
+            name=name,
+            kind=kind,
+            type_=type_,
+            meta=meta,
+            arity=self.nargs_for(name),
+            iterable=iterable,
+            multi_value=iterable and converter is None and kind is not FieldKind.FLAG,
+            converter=converter,
+            coerce=make_coercer(type_),
+            validator=getattr(meta, "validator", _true),
+        )
+
+    def make_plan(self) -> ParsePlan:
+        infos = {name: self.make_field_info(name) for name in self.args.keys()}
+
+        positional_infos = [info for info in infos.values() if info.kind is FieldKind.POSITIONAL]
+        arities = [info.arity for info in positional_infos]
         if arities.count(None) > 1:
             raise ArgumentSpecError("Multiple positional arguments with arbitrary length")
 
-    @property
-    def positional_args(self) -> dict[str, tuple[TypeHint, Positional[Any, Any]]]:
-        return {name: (type_, meta) for name, (type_, meta) in self.args.items() if isinstance(meta, Positional)}
-
-    @property
-    def option_args(self) -> dict[str, tuple[TypeHint, Option[Any, Any]]]:
-        return {name: (type_, meta) for name, (type_, meta) in self.args.items() if isinstance(meta, Option)}
+        # every later positional argument requires at least one token, so sum these up in a single reverse pass
+        required_after = [0] * len(arities)
+        for i in range(len(arities) - 2, -1, -1):
+            required_after[i] = required_after[i + 1] + max(1, arities[i + 1] or 0)
+
+        positionals = tuple(
+            PositionalPlan(
+                info=info,
+                meta=cast(Positional[Any, Any], info.meta),
+                default=coerce_default(info.meta.default, info.type_, info.coerce),
+                required_after=required,
+            )
+            for info, required in zip(positional_infos, required_after)
+        )
 
-    @property
-    def flag_args(self) -> dict[str, tuple[TypeHint, Flag]]:
-        return {name: (type_, meta) for name, (type_, meta) in self.args.items() if isinstance(meta, Flag)}
+        static_defaults: dict[str, Any] = {}
+        defaults: list[FieldInfo] = []
 
-    @property
-    def help_keys(self) -> list[str]:
-        return [k for k in ("-h", "--help") if k not in {**self.args, **self.aliases}.keys()]
+        for info in infos.values():
+            if info.kind is FieldKind.POSITIONAL:
+                continue
 
-    @property
-    def named_tokens(self) -> set[str]:
-        return set(self.aliases.keys()) | set(self.flag_negators.keys())
+            if (default := coerce_default(info.meta.default, info.type_, info.coerce)) is not MISSING:
+                static_defaults[info.name] = default
+            else:
+                defaults.append(info)
+
+        # fields without a validator (or with the default, which accepts everything) don't need to be checked at all
+        validators = tuple((info.name, info.validator) for info in infos.values() if info.validator is not _true)
+
+        tokens = {alias: TokenTarget(infos[name], negated=False) for alias, name in self.aliases.items()}
+        tokens.update({negator: TokenTarget(infos[name], negated=True) for negator, name in self.flag_negators.items()})
+
+        return ParsePlan(
+            fields=infos,
+            tokens=tokens,
+            positionals=positionals,
+            static_defaults=static_defaults,
+            defaults=tuple(defaults),
+            help_keys=frozenset(self.help_keys),
+            validators=validators,
+        )
 
     @staticmethod
     def make_short(name: str) -> str:
@@ -150,7 +514,10 @@ class Schema:
 
         field_map = {f.name: f for f in fields(wrapped_cls)}
 
-        for name, annot in get_annotations(wrapped_cls, eval_str=True).items():
+        # only argspec fields need their annotations evaluated; the others are skipped below anyway
+        argspec_names = {name for name, f in field_map.items() if f.metadata and "argspec" in f.metadata}
+
+        for name, annot in get_resolved_annotations(cast(type, wrapped_cls), argspec_names).items():
             f = field_map.get(name)
 
             assert f is not None
@@ -159,9 +526,22 @@ class Schema:
                 # this isn't an argspec field, so we'll just ignore it
                 continue
 
-            value: Positional[Any, Any] | Option[Any, Any] | Flag = f.metadata["argspec"]
+            args[name] = (annot, f.metadata["argspec"])
 
-            args[name] = (annot, value)
+        # schemas are immutable, so identical class definitions (e.g., the same class body evaluated repeatedly)
+        # can share a single schema rather than recomputing it
+        try:
+            key: Hashable | None = (cls, fingerprint_args(args))
+        except TypeError:
+            # part of the definition is unhashable, so it can't be looked up
+            key = None
+
+        if key is not None and (cached := _schema_cache.get(key)) is not None:
+            return cast(Self, cached)
+
+        value: Positional[Any, Any] | Option[Any, Any] | Flag
+
+        for name, (_, value) in args.items():
             kebab_name = kebabify(name, lower=True)
 
             if isinstance(value, (Option, Flag)):
@@ -178,7 +558,7 @@ class Schema:
                     if value.long:
                         aliases[f"--{name}"] = name
 
-                for alias in value.aliases or []:
+                for alias in value.aliases:
                     if alias in aliases:
                         raise ArgumentSpecError(f"Duplicate option alias: {alias}")
                     aliases[alias] = name
@@ -190,7 +570,7 @@ class Schema:
 
             # flag negators
             if isinstance(value, Flag):
-                for negator in value.negators or []:
+                for negator in value.negators:
                     if negator in (*aliases.keys(), *flag_negators.keys()):
                         raise ArgumentSpecError(f"Duplicate flag negator: {negator}")
 
@@ -200,7 +580,21 @@ class Schema:
                 if value.default is True and not value.negators and (negator := f"--no-{kebab_name}") not in aliases:
                     flag_negators[negator] = name
 
-        return cls(args=args, aliases=aliases, flag_negators=flag_negators)
+        # intern the named tokens, since every argv token is compared against them
+        schema = cls(
+            args=args,
+            aliases={sys.intern(alias): name for alias, name in aliases.items()},
+            flag_negators={sys.intern(negator): name for negator, name in flag_negators.items()},
+        )
+
+        if key is not None:
+            if len(_schema_cache) >= SCHEMA_CACHE_SIZE:
+                # evict the oldest entry
+                del _schema_cache[next(iter(_schema_cache))]
+
+            _schema_cache[key] = schema
+
+        return schema
 
     def get_all_names_for(self, name: str, meta: Option[Any, Any] | Flag) -> list[str]:
         names = [kebabify(name if name.startswith("-") else f"--{name}", lower=True)]
@@ -214,94 +608,122 @@ class Schema:
         return names
 
     def help(self) -> str:
-        """Return a help string for the given argument specification schema."""
-        buffer = StringIO()
+        """Return a help string for the given argument specification schema.
+
+        The help template is cached per sys.argv[0], so only the parts showing the output of a default_factory (such
+        as the current value of a readenv variable) are recomputed on each call.
+        """
+        argv0 = sys.argv[0]
+
+        if (template := self.help_cache.get(argv0)) is None:
+            template = self.help_cache[argv0] = self.help_template(prog=get_program_name(argv0))
 
-        buffer.write("Usage:\n")
+        # bind the environment lookup once for every readenv fragment rendered below
+        getenv = os.environ.get
+        return "".join(part if isinstance(part, str) else part(getenv) for part in template)
+
+    def help_template(self, prog: str) -> tuple[HelpPart, ...]:
+        """Build the help template for the given argument specification schema, using the given program name.
+        Consecutive pieces of fixed text are merged, so rendering the template is a single join.
+        """
         positionals = " ".join(
             format_help_message_for_positional(name, type_, meta)
             for name, (type_, meta) in self.positional_args.items()
         )
-        prog = Path(sys.argv[0]).name
 
-        buffer.write(f"    {prog} [OPTIONS] {positionals}\n\n")
-        buffer.write("Options:\n")
+        parts: list[HelpPart] = [f"Usage:\n    {prog} [OPTIONS] {positionals}\n\n", *self.help_sections()]
+
+        template: list[HelpPart] = []
+        for is_fixed, group in itertools.groupby(parts, key=lambda part: isinstance(part, str)):
+            if is_fixed:
+                template.append("".join(cast(Iterable[str], group)))
+            else:
+                template.extend(group)
+
+        return tuple(template)
+
+    def help_sections(self) -> tuple[HelpPart, ...]:
+        """Return the parts of the help text describing the options and arguments.
+        These don't depend on the program name, so they're built once and shared by every help template.
+        """
+        if self.help_body is not None:
+            return self.help_body
+
+        parts: list[HelpPart] = ["Options:\n"]
 
         # help/usage message
         if self.help_keys:
             names = ", ".join(self.help_keys)
-            buffer.write(f"    {names}\n")
-            buffer.write("    Print this message and exit\n\n")
+            parts.append(f"    {names}\n")
+            parts.append("    Print this message and exit\n\n")
 
         # flags
 
         meta: Flag | Option[Any, Any] | Positional[Any, Any]
 
+        # group the negators by flag in a single pass, keeping the order in which they were declared
+        negators_for: dict[str, list[str]] = {}
+        for negator, name in self.flag_negators.items():
+            negators_for.setdefault(name, []).append(negator)
+
         for name, (type_, meta) in self.flag_args.items():
             names = ", ".join(self.get_all_names_for(name, meta))
 
-            buffer.write(f"    true: {names}\n")
+            parts.append(f"    true: {names}\n")
 
-            if negators := {k for k, v in self.flag_negators.items() if v == name}:
-                buffer.write(f"    false: {', '.join(negators)}\n")
+            if negators := negators_for.get(name):
+                parts.append(f"    false: {', '.join(negators)}\n")
 
-            buffer.write(f"    {meta.help or ''}")
-            buffer.write(f" (default: {meta.default})")
+            parts.append(f"    {meta.help or ''}")
+            parts.append(f" (default: {meta.default})")
 
-            buffer.write("\n\n")
+            parts.append("\n\n")
 
         # values
         for name, (type_, meta) in self.option_args.items():
             names = ", ".join(self.get_all_names_for(name, meta))
 
-            buffer.write(f"    {names} {name.upper()} <{as_string(type_)}>\n")
-            buffer.write(f"    {meta.help or ''}")
+            parts.append(f"    {names} {name.upper()} <{as_string(type_)}>\n")
+            parts.append(f"    {meta.help or ''}")
 
             if (default := meta.default) is not MISSING:
-                buffer.write(f" (default: {default})")
+                parts.append(f" (default: {default})")
             elif (factory := meta.default_factory) is not None:
-                if isinstance(factory, readenv):
-                    # get the current value of the variable
-                    current = factory()
-                    if current is MISSING:
-                        current = "<unset>"
-                    elif factory.secret:
-                        current = "******"
-                    else:
-                        current = repr(current)
-
-                    # print a useful message for the user
-                    if factory.default is MISSING:
-                        buffer.write(f" (default: ${factory.key} (currently: {current}))")
-                    else:
-                        buffer.write(f" (default: ${factory.key} or {factory.default!r} (currently: {current}))")
-                else:
-                    buffer.write(f" (default: {factory()})")
+                # the factory's output can change between calls, so it's evaluated when the help is rendered
+                parts.append(functools.partial(format_factory_default, factory))
 
-            buffer.write("\n\n")
+            parts.append("\n\n")
 
         # positional arguments
-        buffer.write("\nArguments:\n")
+        parts.append("\nArguments:\n")
         for name, (type_, meta) in self.positional_args.items():
-            buffer.write(f"    {kebabify(name.upper())} <{as_string(type_)}>\n")
-            buffer.write(f"    {meta.help or ''}")
+            parts.append(f"    {kebabify(name.upper())} <{as_string(type_)}>\n")
+            parts.append(f"    {meta.help or ''}")
 
             if meta.default is not MISSING:
-                buffer.write(f" (default: {meta.default})")
+                parts.append(f" (default: {meta.default})")
 
-            buffer.write("\n\n")
+            parts.append("\n\n")
 
-        return buffer.getvalue()
+        body = tuple(parts)
+        object.__setattr__(self, "help_body", body)
+        return body
 
-    def pop_until_next_token_or_limit(self, pool: deque[str], name: str, arity: int | None) -> list[str]:
+    def pop_until_next_token_or_limit(
+        self, pool: list[str], start: int, name: str, arity: int | None
+    ) -> tuple[list[str], int]:
+        """Take values from the pool beginning at index `start`. Return them along with the index of the next token."""
         tokens: list[str] = []
+        index = start
+        end = len(pool)
+        named_tokens = self.named_tokens
 
         for taken in itertools.count():
             if arity is not None and taken >= arity:
                 # we've hit the arity limit
                 break
 
-            if not pool:
+            if index >= end:
                 # we've run out of tokens to take
                 if arity is None:
                     # this is fine, because we were just picking until we ran out
@@ -309,78 +731,95 @@ class Schema:
 
                 raise ArgumentError(f"Missing value for option --{kebabify(name)}")
 
-            val = pool.popleft()
-            if val in self.named_tokens:
-                # this is another token, so put it back
-                pool.appendleft(val)
+            val = pool[index]
+            if val in named_tokens:
+                # this is another token, so leave it in the pool
                 break
 
+            index += 1
+
             if val == "--":
                 # we've hit the end of the available tokens
                 break
 
             tokens.append(val)
 
-        return tokens
+        return tokens, index
 
-    def consume_argv(self, argv: deque[str]) -> ArgvConsumeResult:
+    def consume_argv(self, argv: list[str]) -> ArgvConsumeResult:
+        """Consume the options and flags in argv, collecting everything else as positional arguments.
+        Note that argv may be modified in place, so it should not be the caller's own list.
+        """
         parsed_args: dict[str, Any] = {}
-        positional_args: deque[str] = deque()
+        positional_args: list[str] = []
+
+        # bind the lookups used for every token to locals to keep attribute access out of the loop
+        tokens = self.plan.tokens
 
-        while argv:
-            token = argv.popleft()
+        index = 0
+        end = len(argv)
+
+        while index < end:
+            token = argv[index]
+            index += 1
 
             if token == "--":
-                positional_args.extend(argv)
+                positional_args.extend(argv[index:])
                 break
 
-            if token.startswith("-") and "=" in token:
+            # most named tokens are matched exactly, so `--key=value` is only looked for when the lookup misses;
+            # "=" is tested before startswith since it's a cheap operator check that rules out nearly every token
+            if (target := tokens.get(token)) is None:
+                if "=" not in token or not token.startswith("-"):
+                    positional_args.append(token)
+                    continue
+
                 # allow `--key=value` to be interpreted as `--key value`
                 # by stripping out the value and just adding it back into the pool
-                token, val = token.split("=", maxsplit=1)
+                # (in the slot that the combined token occupied, so that it's the next one read)
+                token, _, val = token.partition("=")
 
-                if self.is_flag(token):
+                if (target := tokens.get(token)) is not None and target.info.kind is FieldKind.FLAG:
                     raise ArgumentError(f"Flag {token} does not take a value (`{token}={val}`)")
 
-                argv.appendleft(val)
+                index -= 1
+                argv[index] = val
 
-            if token not in self.named_tokens:
-                positional_args.append(token)
-                continue
+                if target is None:
+                    positional_args.append(token)
+                    continue
+
+            info = target.info
+            name = info.name
 
-            if token in self.flag_negators:
-                name = self.flag_negators[token]
+            if target.negated:
                 parsed_args[name] = False
                 continue
 
-            name = self.aliases[token]
-            type_, meta = self.args[name]
+            if info.kind is FieldKind.OPTION:
+                value: str | list[str]
 
-            if isinstance(meta, Option):
-                try:
-                    value = (
-                        self.pop_until_next_token_or_limit(argv, name, arity=self.nargs_for(name))
-                        if is_iterable(type_) and not meta.converter
-                        else argv.popleft()
-                    )
-                except IndexError:
+                if info.multi_value:
+                    value, index = self.pop_until_next_token_or_limit(argv, index, name, info.arity)
+                elif index < end:
+                    value = argv[index]
+                    index += 1
+                else:
                     raise ArgumentError(f"Missing value for option --{kebabify(name)}")
-                except ArgumentError:
-                    raise
 
-                if meta.converter:
+                if info.converter:
                     assert isinstance(value, str)
                     try:
-                        value = meta.converter(value)
+                        value = info.converter(value)
                     except Exception as err:
                         raise ArgumentError(f"Invalid value for option --{kebabify(name)}: {value} ({err})")
 
                 try:
-                    parsed_args[name] = as_type(value, type_)
+                    parsed_args[name] = info.coerce(value)
                 except ValueError as err:
                     raise ArgumentError(f"Invalid value for option --{kebabify(name)}: {value} ({err})")
 
-            elif isinstance(meta, Flag):
+            elif info.kind is FieldKind.FLAG:
                 parsed_args[name] = True
 
             else:
@@ -388,117 +827,122 @@ class Schema:
 
         return ArgvConsumeResult(parsed_args, positional_args)
 
-    def required_positionals_after(self, name: str) -> int:
-        names = list(self.positional_args.keys())
-        index = names.index(name)
+    def assign_positional_arg(self, entry: PositionalPlan, positional_args: list[str], start: int) -> tuple[Any, int]:
+        """Assign a value to the positional argument, taking tokens from index `start` of positional_args.
+        Return the value along with the index of the first token not taken.
+        """
+        info, meta, default, required_after = entry
+        name, arity, coerce = info.name, info.arity, info.coerce
 
-        nargs = [cast(int, self.nargs_for(arg)) for arg in names[index + 1 :]]
-        return sum(max(1, n) for n in nargs)
+        if start >= len(positional_args):
+            if default is not MISSING:
+                return default, start
 
-    def assign_positional_arg(self, name: str, positional_args: deque[str]) -> Any:
-        type_, meta = self.args[name]
-        assert isinstance(meta, Positional)
-
-        if not positional_args:
             if meta.default is not MISSING:
-                return as_type(meta.default, type_)
+                return coerce(meta.default), start
 
             if meta.default_factory is not None:
                 if (default := meta.default_factory()) is MISSING:
                     raise ArgumentError(f"Missing positional argument: {name}")
 
-                return as_type(default, type_)
+                return coerce(default), start
 
-            if is_iterable(type_):
-                return as_type([], type_)
+            if info.iterable:
+                return coerce([]), start
 
             raise ArgumentError(f"Missing positional argument: {name}")
 
-        if not is_iterable(type_) or meta.converter is not None:
-            value = positional_args.popleft()
+        if not info.multi_value:
+            value = positional_args[start]
 
-            if meta.converter:
+            if info.converter:
                 try:
-                    value = meta.converter(value)
+                    value = info.converter(value)
                 except Exception as err:
                     raise ArgumentError(f"Invalid value for positional argument {name}: {value} ({err})")
 
             try:
-                return as_type(value, type_)
+                return coerce(value), start + 1
             except ValueError as err:
                 raise ArgumentError(f"Invalid value for positional argument {name}: {value} ({err})")
 
-        collected = []
-
-        if (arity := self.nargs_for(name)) is None:
+        if arity is None:
             # consume as much as possible
-            arity = len(positional_args) - self.required_positionals_after(name)
+            arity = max(0, len(positional_args) - start - required_after)
 
-        for _ in range(arity):
-            try:
-                value = positional_args.popleft()
-            except IndexError:
-                raise ArgumentError(f"Missing value for positional argument {name}")
-            collected.append(value)
+        if start + arity > len(positional_args):
+            raise ArgumentError(f"Missing value for positional argument {name}")
+
+        collected = positional_args[start : start + arity]
 
         if not collected and meta.default is not MISSING:
-            return as_type(meta.default, type_)
+            return (default if default is not MISSING else coerce(meta.default)), start
 
         try:
-            return as_type(collected, type_)
+            return coerce(collected), start + arity
         except ValueError as err:
             raise ArgumentError(f"Invalid value for positional argument {name}: {collected} ({err})")
 
-    def assign_positional_args(self, parsed_args: dict[str, Any], positional_args: deque[str]) -> None:
-        """Update the parsed_args dict by assigning the positional arguments according to the schema."""
-        for name in self.positional_args.keys():
-            parsed_args[name] = self.assign_positional_arg(name, positional_args)
+    def assign_positional_args(self, parsed_args: dict[str, Any], positional_args: list[str]) -> int:
+        """Update the parsed_args dict by assigning the positional arguments according to the schema.
+        Return the number of positional tokens that were used.
+        """
+        index = 0
 
-    def raise_if_extra_positional_args(self, positional_args: deque[str]) -> None:
+        for entry in self.plan.positionals:
+            parsed_args[entry.info.name], index = self.assign_positional_arg(entry, positional_args, index)
+
+        return index
+
+    def raise_if_extra_positional_args(self, positional_args: list[str]) -> None:
         if positional_args:
             raise ArgumentError(f"Too many positional arguments: {', '.join(positional_args)}")
 
     def apply_defaults(self, parsed_args: dict[str, Any]) -> None:
-        for name, (type_, meta) in self.args.items():
-            value = parsed_args.get(name, meta)
+        for name, default in self.plan.static_defaults.items():
+            parsed_args.setdefault(name, default)
 
-            if isinstance(value, Flag):
-                parsed_args[name] = as_type(value.default, type_)
+        for info in self.plan.defaults:
+            name, meta = info.name, info.meta
+            if name in parsed_args:
+                continue
 
-            if isinstance(value, Option):
-                if value.default is not MISSING:
-                    parsed_args[name] = as_type(value.default, type_)
-                    continue
+            if isinstance(meta, Flag) or meta.default is not MISSING:
+                parsed_args[name] = info.coerce(meta.default)
+                continue
 
-                if value.default_factory is None or (default := value.default_factory()) is MISSING:
-                    raise ArgumentError(f"Missing value for: --{kebabify(name)}")
+            if meta.default_factory is None or (factory_default := meta.default_factory()) is MISSING:
+                raise ArgumentError(f"Missing value for: --{kebabify(name)}")
 
-                parsed_args[name] = as_type(default, type_)
+            parsed_args[name] = info.coerce(factory_default)
 
     def run_validators(self, parsed_args: dict[str, Any]) -> None:
-        for name, (type_, meta) in self.args.items():
+        for name, validator in self.plan.validators:
             value = parsed_args[name]
-            validator = getattr(meta, "validator", _true)
 
             if not validator(value):
                 raise ArgumentError(f"Invalid value for {kebabify(name)}: {value}")
 
     def parse_args(self, argv: Sequence[str] | None = None) -> dict[str, Any]:
         """Parse the given argv (or sys.argv[1:]) into a dict according to the schema."""
-        argv = deque(argv if argv is not None else sys.argv[1:])
+        argv = list(argv if argv is not None else sys.argv[1:])
 
         # check for help
-        if set(argv) & set(self.help_keys):
+        if argv and not self.plan.help_keys.isdisjoint(argv):
             sys.stderr.write(self.help() + "\n")
             sys.exit(0)
 
         try:
             # handle options and flags
             # note that parsed_args and positional_args are mutated throughout this chain
-            parsed_args, positional_args = self.consume_argv(argv)
+            if argv:
+                parsed_args, positional_args = self.consume_argv(argv)
+            else:
+                # there's nothing to consume, so go straight to filling in the defaults
+                parsed_args, positional_args = {}, []
 
-            self.assign_positional_args(parsed_args, positional_args)
-            self.raise_if_extra_positional_args(positional_args)
+            used = self.assign_positional_args(parsed_args, positional_args)
+            self.raise_if_extra_positional_args(positional_args[used:])
             self.apply_defaults(parsed_args)
             self.run_validators(parsed_args)
         except ArgumentError:
@@ -511,10 +955,10 @@ class Schema:
 
         try:
             # recoerce types
-            for name, (type_, _) in self.args.items():
+            for name, info in self.plan.fields.items():
                 value = getattr(instance, name)
                 try:
-                    kwargs[name] = as_type(value, type_)
+                    kwargs[name] = info.coerce(value)
                 except ValueError as err:
                     raise ValueError(f"Invalid value for {name}: {value!r} ({err})")
 
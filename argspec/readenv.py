@@ -1,16 +1,79 @@
+from collections.abc import Callable, Hashable
 import os
 from typing import Any
 
 from .metadata import MISSING
 
+# a function looking up an environment variable, with a fallback, like os.environ.get
+EnvGetter = Callable[[str, Any], Any]
+
+READENV_CACHE_SIZE = 256
+
 
 class readenv:
-    """A zero-argument callable that returns the value of an environment variable when called."""
+    """A zero-argument callable that returns the value of an environment variable when called.
+
+    Instances are interned, so that repeated calls with the same (hashable) arguments return the same object.
+    """
+
+    key: str
+    default: Any
+    secret: bool
+    help_prefix: str  # the fixed part of the help fragment, which only needs the current value filling in
+
+    _instances: dict[Hashable, "readenv"] = {}
+
+    def __new__(cls, key: str, default: Any = MISSING, *, secret: bool = False) -> "readenv":
+        # the attributes are set here rather than in __init__, which would run again (and overwrite them) every time
+        # an interned instance is handed back
+        try:
+            # the type and repr of the default are included so that values which compare equal but behave or display
+            # differently (e.g., 1 and True, or 0.0 and -0.0) don't share an instance
+            ident: Hashable = (cls, key, type(default), default, repr(default), secret)
+            cached = readenv._instances.get(ident)
+        except TypeError:
+            # the default is unhashable, so this instance can't be shared
+            return super().__new__(cls)._setup(key, default, secret)
+
+        if cached is None:
+            if len(readenv._instances) >= READENV_CACHE_SIZE:
+                # evict the oldest entry
+                del readenv._instances[next(iter(readenv._instances))]
+
+            cached = readenv._instances[ident] = super().__new__(cls)._setup(key, default, secret)
 
-    def __init__(self, key: str, default: Any = MISSING, *, secret: bool = False) -> None:
+        return cached
+
+    def _setup(self, key: str, default: Any, secret: bool) -> "readenv":
         self.key = key
         self.default = default
         self.secret = secret
 
+        if default is MISSING:
+            self.help_prefix = f" (default: ${key} (currently: "
+        else:
+            self.help_prefix = f" (default: ${key} or {default!r} (currently: "
+
+        return self
+
+    def __getnewargs_ex__(self) -> tuple[tuple[Any, ...], dict[str, Any]]:
+        # __new__ requires the key, so copy and pickle need to be told what to pass it
+        return (self.key, self.default), {"secret": self.secret}
+
     def __call__(self) -> Any:
         return os.environ.get(self.key, self.default)
+
+    def help_fragment(self, getenv: EnvGetter | None = None) -> str:
+        """Describe the variable and its current value, for use in the help message.
+        getenv defaults to os.environ.get, but can be given so that a caller rendering several fragments binds it once.
+        """
+        current = (getenv or os.environ.get)(self.key, self.default)
+
+        if current is MISSING:
+            shown = "<unset>"
+        elif self.secret:
+            shown = "******"
+        else:
+            shown = repr(current)
+
+        return f"{self.help_prefix}{shown}))"
@@ -1,6 +1,6 @@
 import dataclasses
 from pathlib import Path
-from typing import Literal
+from typing import Annotated, Literal
 
 import pytest
 
@@ -28,6 +28,56 @@ def test_basic_usage() -> None:
     assert config.verbose
 
 
+def test_string_annotations_are_resolved() -> None:
+    class Config(ArgSpec):
+        path: "Path" = positional()
+        ports: "list[int]" = option([80])
+
+    config = Config.from_argv(["/path/to/file", "--ports", "8080", "8081"])
+
+    assert config.path == Path("/path/to/file")
+    assert config.ports == [8080, 8081]
+
+
+def test_string_annotations_of_plain_fields_are_not_evaluated() -> None:
+    class Config(ArgSpec):
+        path: "Path" = positional()
+        cache: "UndefinedCacheType | None" = None  # type: ignore[name-defined]  # noqa: F821
+
+    config = Config.from_argv(["/path/to/file"])
+
+    assert config.path == Path("/path/to/file")
+    assert config.cache is None
+
+
+def test_annotated_with_unhashable_metadata() -> None:
+    class Config(ArgSpec):
+        n: Annotated[int, {"unit": "s"}] = option(3)
+
+    assert Config.from_argv([]).n == 3
+    assert Config.from_argv(["--n", "5"]).n == 5
+
+
+def test_parameterised_builtin_generic_annotation() -> None:
+    class Config(ArgSpec):
+        kind: type[int] = option(int)
+
+    assert Config.from_argv([]).kind is int
+    assert Config(kind=bool).kind is bool
+
+
+def test_static_defaults_are_coerced_to_the_annotated_type() -> None:
+    class Config(ArgSpec):
+        path: Path = positional("/path/to/file")
+        count: int = option("1")
+
+    config = Config.from_argv([])
+
+    assert config.path == Path("/path/to/file")
+    assert config.count == 1
+    assert isinstance(config.count, int)
+
+
 def test_basic_usage_with_defaults() -> None:
     class Config(ArgSpec):
         path: Path = positional(Path("/path/to/file"))
@@ -65,6 +65,14 @@ def test_help_output_includes_flag_negators() -> None:
     assert "false: --quiet" in help_text
 
 
+def test_help_output_lists_flag_negators_in_declaration_order() -> None:
+    class Config(ArgSpec):
+        verbose: bool = flag(True, negators=("--quiet", "--silent", "-q"))
+
+    help_text = Config.__argspec_schema__.help()
+    assert "false: --quiet, --silent, -q" in help_text
+
+
 def test_help_output_includes_option_aliases() -> None:
     class Config(ArgSpec):
         path: str = option(aliases=["-a", "-b", "--some-path"])
@@ -266,3 +274,34 @@ def test_correct_type_hints_in_help() -> None:
     help_text = Config.__argspec_schema__.help()
     assert "--ports PORTS <list[int]>\n    list of ports" in help_text
     assert "Arguments:\n    PATH <Path>\n    path to file" in help_text
+
+
+def test_help_reflects_current_program_name(monkeypatch: pytest.MonkeyPatch) -> None:
+    class Config(ArgSpec):
+        verbose: bool = flag()
+
+    monkeypatch.setattr("sys.argv", ["/usr/bin/first-program"])
+    assert "first-program [OPTIONS]" in Config.__argspec_schema__.help()
+
+    monkeypatch.setattr("sys.argv", ["/usr/bin/second-program"])
+    assert "second-program [OPTIONS]" in Config.__argspec_schema__.help()
+
+
+@pytest.mark.parametrize("argv0", ["", ".", "prog", "prog/", "dir/prog/.", "./prog.py", "dir/..", "/usr/bin/prog"])
+def test_help_program_name_matches_path_name(monkeypatch: pytest.MonkeyPatch, argv0: str) -> None:
+    class Config(ArgSpec):
+        verbose: bool = flag()
+
+    monkeypatch.setattr("sys.argv", [argv0])
+    assert f"Usage:\n    {Path(argv0).name} [OPTIONS]" in Config.__argspec_schema__.help()
+
+
+def test_help_shows_union_members_in_the_order_they_were_written() -> None:
+    class IntFirst(ArgSpec):
+        value: int | str = option(1)
+
+    class StrFirst(ArgSpec):
+        value: str | int = option(1)
+
+    assert "<int | str>" in IntFirst.__argspec_schema__.help()
+    assert "<str | int>" in StrFirst.__argspec_schema__.help()
@@ -54,6 +54,16 @@ def test_flag_equals_explicit_false_is_error() -> None:
         Config._from_argv(argv)
 
 
+def test_negator_equals_value_is_error() -> None:
+    class Config(ArgSpec):
+        verbose: bool = flag(True)
+
+    argv = ["--no-verbose=true"]
+
+    with pytest.raises(ArgumentError):
+        Config._from_argv(argv)
+
+
 def test_positional_with_equal_sign_does_not_get_split() -> None:
     class Config(ArgSpec):
         metadata: str = positional()
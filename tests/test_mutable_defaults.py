@@ -31,3 +31,44 @@ def test_shared_mutable_defaults_arent_actually_shared_option() -> None:
 
     assert config1.field == [1]
     assert config2.field == []
+
+
+def test_immutable_defaults_coerced_to_mutable_types_arent_shared() -> None:
+    class Config(ArgSpec):
+        field: list[int] = option((1, 2))
+
+    config1 = Config.from_argv([])
+    config2 = Config.from_argv([])
+
+    config1.field.append(3)
+
+    assert config1.field == [1, 2, 3]
+    assert config2.field == [1, 2]
+
+
+class Endpoint:
+    created = 0
+
+    def __init__(self, url: str) -> None:
+        Endpoint.created += 1
+        self.url = url
+
+
+def test_defaults_coerced_to_user_defined_classes_arent_shared() -> None:
+    created = Endpoint.created
+
+    class Config(ArgSpec):
+        endpoint: Endpoint = option("http://example.com")
+
+    # the default is coerced when parsing, not when the class is defined
+    assert Endpoint.created == created
+
+    config1 = Config.from_argv([])
+    config2 = Config.from_argv([])
+
+    assert config1.endpoint is not config2.endpoint
+
+    config1.endpoint.url = "mutated"
+
+    assert config2.endpoint.url == "http://example.com"
+    assert Config.from_argv([]).endpoint.url == "http://example.com"
@@ -1,4 +1,6 @@
+import copy
 import os
+import pickle
 
 import pytest
 
@@ -114,3 +116,58 @@ def test_readenv_secret() -> None:
 
     config = Config.from_argv([])
     assert config.api_key == value
+
+
+def test_help_message_for_readenv_tracks_environment_changes() -> None:
+    class Config(ArgSpec):
+        api_key: str = option(default_factory=readenv("SERVICE_API_KEY"), help="the API key for the service")
+
+    os.environ.pop("SERVICE_API_KEY", None)
+    assert "(currently: <unset>)" in Config.__argspec_schema__.help()
+
+    os.environ["SERVICE_API_KEY"] = "environment value for service api key"
+    assert "(currently: 'environment value for service api key')" in Config.__argspec_schema__.help()
+
+
+def test_readenv_instances_are_interned() -> None:
+    assert readenv("SERVICE_API_KEY") is readenv("SERVICE_API_KEY")
+    assert readenv("SERVICE_API_KEY", "fallback") is readenv("SERVICE_API_KEY", "fallback")
+
+    assert readenv("SERVICE_API_KEY") is not readenv("SERVICE_API_KEY", secret=True)
+    assert readenv("SERVICE_API_KEY", 1) is not readenv("SERVICE_API_KEY", True)
+
+
+def test_readenv_with_unhashable_default() -> None:
+    factory = readenv("SERVICE_API_KEY", ["fallback"])
+
+    os.environ.pop("SERVICE_API_KEY", None)
+    assert factory() == ["fallback"]
+    assert factory is not readenv("SERVICE_API_KEY", ["fallback"])
+
+
+def test_readenv_help_fragment_uses_given_environment_getter() -> None:
+    factory = readenv("SERVICE_API_KEY", "fallback value")
+
+    set_environment = {"SERVICE_API_KEY": "given value"}
+    assert "(currently: 'given value')" in factory.help_fragment(set_environment.get)
+
+    unset_environment: dict[str, str] = {}
+    assert "(currently: 'fallback value')" in factory.help_fragment(unset_environment.get)
+
+
+def test_readenv_interning_does_not_change_existing_instances() -> None:
+    positive = readenv("SERVICE_API_KEY", 0.0)
+    negative = readenv("SERVICE_API_KEY", -0.0)
+
+    assert positive is not negative
+    assert str(positive.default) == "0.0"
+    assert str(negative.default) == "-0.0"
+
+
+def test_readenv_can_be_copied_and_pickled() -> None:
+    factory = readenv("SERVICE_API_KEY", "fallback value", secret=True)
+    os.environ.pop("SERVICE_API_KEY", None)
+
+    for duplicate in (copy.copy(factory), copy.deepcopy(factory), pickle.loads(pickle.dumps(factory))):
+        assert (duplicate.key, duplicate.default, duplicate.secret) == ("SERVICE_API_KEY", "fallback value", True)
+        assert duplicate() == "fallback value"
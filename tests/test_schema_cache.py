@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+from argspec import ArgSpec, flag, option, positional, readenv
+
+
+def make_config_class() -> type[ArgSpec]:
+    class Config(ArgSpec):
+        path: str = positional()
+        port: int = option(8080, aliases=["-p"])
+        verbose: bool = flag()
+
+    return Config
+
+
+def test_identical_definitions_share_a_schema() -> None:
+    first = make_config_class()
+    second = make_config_class()
+
+    assert first is not second
+    assert first.__argspec_schema__ is second.__argspec_schema__
+
+
+def test_definitions_with_equal_but_differently_typed_defaults_do_not_share_a_schema() -> None:
+    class IntConfig(ArgSpec):
+        value: int = option(1)
+
+    class BoolConfig(ArgSpec):
+        value: int = option(True)
+
+    assert IntConfig.__argspec_schema__ is not BoolConfig.__argspec_schema__
+
+
+def test_definitions_with_different_validators_do_not_share_a_schema() -> None:
+    class Config(ArgSpec):
+        value: int = option(1, validator=lambda value: value > 0)
+
+    class OtherConfig(ArgSpec):
+        value: int = option(1, validator=lambda value: value < 0)
+
+    assert Config.__argspec_schema__ is not OtherConfig.__argspec_schema__
+
+
+def test_definitions_with_unhashable_defaults_still_build() -> None:
+    class Config(ArgSpec):
+        values: dict[str, int] = option({"a": 1})
+
+    assert Config.from_argv([]).values == {"a": 1}
+
+
+def test_identical_definitions_using_readenv_share_a_schema() -> None:
+    def make() -> type[ArgSpec]:
+        class Config(ArgSpec):
+            api_key: str = option(default_factory=readenv("SERVICE_API_KEY"))
+
+        return Config
+
+    assert make().__argspec_schema__ is make().__argspec_schema__
+
+
+def test_definitions_with_equal_but_differently_displayed_defaults_do_not_share_a_schema() -> None:
+    class ShortConfig(ArgSpec):
+        value: Decimal = option(Decimal("1.0"))
+
+    class LongConfig(ArgSpec):
+        value: Decimal = option(Decimal("1.00"))
+
+    assert ShortConfig.__argspec_schema__ is not LongConfig.__argspec_schema__
+    assert str(LongConfig.from_argv([]).value) == "1.00"
+    assert "(default: 1.00)" in LongConfig.__argspec_schema__.help()
+
+
+def test_definitions_with_signed_zero_defaults_do_not_share_a_schema() -> None:
+    class PositiveConfig(ArgSpec):
+        value: float = option(0.0)
+
+    class NegativeConfig(ArgSpec):
+        value: float = option(-0.0)
+
+    assert str(PositiveConfig.from_argv([]).value) == "0.0"
+    assert str(NegativeConfig.from_argv([]).value) == "-0.0"
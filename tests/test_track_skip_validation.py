@@ -40,3 +40,26 @@ def test_track_skip_validation_can_be_cleaned() -> None:
 
     new = args.replace(x=2)
     assert new.__ARGSPEC_VALIDATED__  # type: ignore[attr-defined]
+
+
+def test_track_skip_validation_is_true_from_argv() -> None:
+    class Args(ArgSpec):
+        x: int = positional()
+
+    args = Args.from_argv(["1"])
+    assert args.x == 1
+    assert args.__ARGSPEC_VALIDATED__  # type: ignore[attr-defined]
+
+
+def test_from_argv_runs_validators_once() -> None:
+    calls: list[int] = []
+
+    def is_positive(x: int) -> bool:
+        calls.append(x)
+        return x > 0
+
+    class Args(ArgSpec):
+        x: int = positional(validator=is_positive)
+
+    Args.from_argv(["1"])
+    assert calls == [1]